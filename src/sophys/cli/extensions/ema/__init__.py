@@ -1,4 +1,5 @@
 import functools
+import itertools
 import logging
 import typing
 
@@ -18,7 +19,6 @@ from sophys.cli.core.magics.tools_magics import KBLMagics, SophysLiveViewMagics,
 
 from sophys.cli.core.magics.sample_plan_definitions import PlanReadMany, PlanCount
 
-from .eds.device_selector import spawnDeviceSelector
 from .input_processor import input_processor
 from .ipython_config import setup_prompt
 from .plans import PlanAbsNDScan, PlanRelNDScan, PlanAbsGridScan, PlanRelGridScan, PlanAbsNDListScan, PlanRelNDListScan, PlanGridScanWithJitter, PlanMotorOrigin, PlanCT, PlanMV, PlanEScan, PlanEScanFly, PlanMoveEnergy, PlanAbsGridEnergyScan, PlanRelGridEnergyScan
@@ -33,6 +33,8 @@ class DeviceSelectorMagics(Magics):
         if data_source is None:
             logging.error("Could not run device selector. No data source variable in the namespace.")
 
+        # Qt is only needed for the device selector, so don't load it with the extension.
+        from .eds.device_selector import spawnDeviceSelector
         spawnDeviceSelector(data_source)
 
     @staticmethod
@@ -86,15 +88,17 @@ def populate_mnemonics(*devices, md):
         else:
             res[mnemonic] = name
 
-    for d in devices:
-        inner(d, mnemonic_to_pv_name(d))
+    read_before = md.get("READ_BEFORE", "").split(',')
+    read_after = md.get("READ_AFTER", "").split(',')
+
+    # Devices are commonly both selected and read before / after, so only look each of them up once.
+    seen = set()
+    for d in itertools.chain(devices, read_before, read_after):
+        if len(d) == 0 or d in seen:
+            continue
+        seen.add(d)
 
-    for d in md.get("READ_BEFORE", "").split(','):
-        if len(d) > 0:
-            inner(d, mnemonic_to_pv_name(d))
-    for d in md.get("READ_AFTER", "").split(','):
-        if len(d) > 0:
-            inner(d, mnemonic_to_pv_name(d))
+        inner(d, mnemonic_to_pv_name(d))
 
     md["MNEMONICS"] = ",".join(f"{mnemonic}={pv_name}" for mnemonic, pv_name in res.items())
     return md
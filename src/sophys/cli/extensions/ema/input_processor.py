@@ -1,20 +1,70 @@
-import functools
 import logging
+import re
 import typing
 
 from sophys.cli.core.data_source import DataSource
 from sophys.cli.core.magics.plan_magics import PlanInformation
 
 
-def add_detectors(line: str, source: DataSource, plan_information: typing.Optional[PlanInformation] = None):
-    """Insert '-d ...' directive into 'line', with detectors taken from 'source'."""
-    if plan_information is not None:
-        if not plan_information.extra_props.get("has_detectors", True):
-            return line
+# Metadata keys inserted by 'add_metadata', with the data they're filled with.
+_READ_METADATA_KEYS = (
+    ("READ_BEFORE", DataSource.DataType.BEFORE),
+    ("READ_DURING", DataSource.DataType.DURING),
+    ("READ_AFTER", DataSource.DataType.AFTER),
+)
+
+# Plan name at the start of a line, optionally called as a magic ('%name ...').
+_PLAN_NAME_RE = re.compile(r"%?([^ ]+) ")
+
+
+def _append_directive(line: str, directive: str):
+    """Append 'directive' to 'line', if there's any directive to append."""
+    if len(directive) == 0:
+        return line
+    return f"{line.rstrip()} {directive}"
+
+
+def _plan_has_detectors(plan_information: typing.Optional[PlanInformation]):
+    """Whether the plan described by 'plan_information' takes a '-d ...' directive."""
+    return plan_information is None or plan_information.extra_props.get("has_detectors", True)
 
-    plan_name, _, args = line.partition(' ')
+
+def _detectors_directive(source: DataSource):
+    """Create the '-d ...' directive inserted by 'add_detectors'."""
     detectors_str = " ".join(source.get(DataSource.DataType.DETECTORS))
-    return f"{line.rstrip()} -d {detectors_str}"
+    return f"-d {detectors_str}"
+
+
+def _metadata_directive(source: DataSource):
+    """Create the '--md ...' directive inserted by 'add_metadata', or an empty string if there's no metadata to insert."""
+    md_entries = []
+    for key, data_type in _READ_METADATA_KEYS:
+        if len(values_str := ",".join(source.get(data_type))) != 0:
+            md_entries.append(f"{key}={values_str}")
+
+    if len(md_entries) == 0:
+        return ""
+    return f"--md {' '.join(md_entries)}"
+
+
+def _plan_target_directive(source: DataSource):
+    """Create the '--plan_target ...' directive inserted by 'add_plan_target', or an empty string if there's no target."""
+    targets = source.get(DataSource.DataType.MAIN_DETECTOR)
+    if len(targets) == 0:
+        if len(detectors := source.get(DataSource.DataType.DETECTORS)) != 1:
+            return ""
+
+        # When with a single detector selected, use it as the target by default.
+        targets = detectors
+    target = targets[0].strip()
+    return f"--plan_target {target} --md MAIN_COUNTER={target}"
+
+
+def add_detectors(line: str, source: DataSource, plan_information: typing.Optional[PlanInformation] = None):
+    """Insert '-d ...' directive into 'line', with detectors taken from 'source'."""
+    if not _plan_has_detectors(plan_information):
+        return line
+    return _append_directive(line, _detectors_directive(source))
 
 
 def add_metadata(line: str, source: DataSource):
@@ -23,54 +73,37 @@ def add_metadata(line: str, source: DataSource):
 
     This function only inserts metadata related to detector collection code (i.e. baselines and monitors).
     """
-    before_str = ",".join(source.get(DataSource.DataType.BEFORE))
-    during_str = ",".join(source.get(DataSource.DataType.DURING))
-    after_str = ",".join(source.get(DataSource.DataType.AFTER))
-
-    md = ""
-    if len(before_str) != 0:
-        md += f"READ_BEFORE={before_str} "
-    if len(during_str) != 0:
-        md += f"READ_DURING={during_str} "
-    if len(after_str) != 0:
-        md += f"READ_AFTER={after_str} "
-
-    if len(md) == 0:
-        return line
-
-    return f"{line.rstrip()} --md {md.strip()}"
+    return _append_directive(line, _metadata_directive(source))
 
 
 def add_plan_target(line: str, source: DataSource):
     """
     Insert '--after_plan_target' directive into 'line', with the target taken from 'source'.
     """
-
-    targets = source.get(DataSource.DataType.MAIN_DETECTOR)
-    if len(targets) == 0:
-        if len(detectors := source.get(DataSource.DataType.DETECTORS)) != 1:
-            return line
-
-        # When with a single detector selected, use it as the target by default.
-        targets = detectors
-    target = targets[0].strip()
-    return f"{line.rstrip()} --plan_target {target} --md MAIN_COUNTER={target}"
+    return _append_directive(line, _plan_target_directive(source))
 
 
 def input_processor(lines: list[str], plan_whitelist: list[PlanInformation], data_source: DataSource):
     """Process 'lines' to create a valid scan call."""
     logger = logging.getLogger("sophys_cli.ema.input_processor")
 
+    plans_by_name = {}
+    for info in plan_whitelist:
+        plans_by_name.setdefault(info.user_name, info)
+
     def test_should_process(line):
-        line = line.strip()
-        for info in plan_whitelist:
-            needle = info.user_name + " "
-            if line.startswith(needle) or line.startswith("%" + needle):
-                return True, info
-        return False, None
+        match = _PLAN_NAME_RE.match(line.strip())
+        if match is None or (info := plans_by_name.get(match.group(1))) is None:
+            return False, None
+        return True, info
+
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    if debug_enabled:
+        joined_lines = '\n'.join(lines)
+        logger.debug(f"Processing lines: {joined_lines}")
 
-    joined_lines = '\n'.join(lines)
-    logger.debug(f"Processing lines: {joined_lines}")
+    # The directives don't depend on the line, so only build them once, when they're first needed.
+    directives = None
 
     new_lines = []
     for line in lines:
@@ -79,16 +112,17 @@ def input_processor(lines: list[str], plan_whitelist: list[PlanInformation], dat
             new_lines.append(line)
             continue
 
-        processors = [
-            functools.partial(add_detectors, source=data_source, plan_information=plan_information),
-            functools.partial(add_metadata, source=data_source),
-            functools.partial(add_plan_target, source=data_source),
-        ]
+        if directives is None:
+            directives = (_detectors_directive(data_source), _metadata_directive(data_source), _plan_target_directive(data_source))
+        detectors_directive, metadata_directive, plan_target_directive = directives
 
-        for p in processors:
-            line = p(line)
+        if _plan_has_detectors(plan_information):
+            line = _append_directive(line, detectors_directive)
+        line = _append_directive(line, metadata_directive)
+        line = _append_directive(line, plan_target_directive)
         new_lines.append(line)
 
-    joined_new_lines = '\n'.join(new_lines)
-    logger.debug(f"Processed lines: {joined_new_lines}")
+    if debug_enabled:
+        joined_new_lines = '\n'.join(new_lines)
+        logger.debug(f"Processed lines: {joined_new_lines}")
     return new_lines
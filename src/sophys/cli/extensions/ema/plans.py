@@ -1,36 +1,126 @@
 import argparse
+import ast
+import datetime
 import functools
 import os
-import typing
+import re
 
 from collections import defaultdict
 
-from sophys.cli.core.magics.plan_magics import ModeOfOperation
-from sophys.cli.core.magics.plan_magics import PlanCLI, remote_control_available
+from sophys.cli.core.magics.plan_magics import PlanCLI
+
+
+# Detectors used by the energy scans when none are selected.
+_ESCAN_DEFAULT_DETECTORS = ("i0c", "i1c")
+# Substrings identifying the Vortex (XRF) detectors in a mnemonic.
+_VORTEX_TOKENS = ("xrf",)
+
+# Help strings of arguments shared between the plan parsers.
+_HDF_FILE_NAME_HELP = "Save file name for the data HDF5 file generated (if using an AreaDetector). Defaults to 'ascan_hour_minute_second_scanid.h5'."
+_HDF_FILE_PATH_HELP = "Save path for the data HDF5 file generated (if using an AreaDetector). Defaults to CWD."
+_EXPOSURE_TIME_HELP = "Per-point exposure time of the detector. Defaults to using the previously defined exposure time on the IOC."
+_FIRST_MOTOR_HELP = "Mnemonic of the motor on the slowest axis to move."
+_FIRST_START_HELP = "Start position of the first motor, in the motor's EGU."
+_FIRST_STOP_HELP = "End position of the first motor, in the motor's EGU."
+_FIRST_NUM_HELP = "Number of points between the start and end positions of the first motor."
+_SECOND_MOTOR_HELP = "Mnemonic of the motor on the second slowest axis to move."
+_SECOND_START_HELP = "Start position of the second motor, in the motor's EGU."
+_SECOND_STOP_HELP = "End position of the second motor, in the motor's EGU."
+_SECOND_NUM_HELP = "Number of points between the start and end positions of the second motor."
+_SNAKE_HELP = "Whether to snake axes or not. The default behavior is to not snake."
+_ENERGY_RANGE_HELP = "Specify an energy range (in eV), with a step size (in eV)."
+_RELATIVE_TO_HELP = "Calculate all energies relative to this one, in eV."
+_K_RANGE_HELP = "Specify a K-space range (start stop step_size)."
+_INITIAL_ENERGY_HELP = "Initial energy value, in eV."
+_SETTLING_TIME_HELP = "Time (ms) to wait after DCM movement for settling. Default: 250ms"
+_ACQUISITION_TIME_HELP = "Time (ms) for each acquisition pulse. Default: 1000ms"
+# Some Python versions (e.g. 3.10) already append the default to the help of BooleanOptionalAction arguments.
+_DEFAULT_TRUE_HELP = "" if argparse.BooleanOptionalAction(["--probe"], "probe", default=True, help="").help else " Defaults to true."
+_USE_UNDULATOR_HELP = "Whether to change undulator parameters in this plan." + _DEFAULT_TRUE_HELP
+_USE_CRIO01_HELP = "Whether to change and trigger CRIO01 parameters in this plan." + _DEFAULT_TRUE_HELP
+_USE_CRIO02_HELP = "Whether to change and trigger CRIO02 parameters in this plan." + _DEFAULT_TRUE_HELP
+
+
+def _cache_parser(create_parser):
+    @functools.wraps(create_parser)
+    def wrapper(self):
+        # Only the most-derived override caches, so 'super().create_parser()' calls still build a new parser.
+        if type(self).create_parser is not wrapper or not self._parser_is_pure:
+            return create_parser(self)
+
+        if self._cached_parser is None:
+            self._cached_parser = create_parser(self)
+        return self._cached_parser
+
+    return wrapper
+
+
+class _CachedParserCLI:
+    """
+    Mixin to build the argument parser of a plan only once per plan instance.
+
+    The parser of a plan only depends on its configuration, so there's no need
+    to re-create the whole argparse tree on every invocation of the plan.
+
+    Plans whose parser depends on runtime state can set '_parser_is_pure' to
+    False to get a new parser on every call.
+    """
+
+    _parser_is_pure = True
+    _cached_parser = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if "create_parser" in cls.__dict__:
+            cls.create_parser = _cache_parser(cls.__dict__["create_parser"])
+
+
+@functools.lru_cache(maxsize=32)
+def _hdf_template_prefix(template: str) -> str | None:
+    """
+    Get the fixed prefix of a '<prefix>_%H_%M_%S' file name template.
+
+    Returns None if the template has any other format, in which case it must go through strftime.
+    """
+    prefix, suffix, rest = template.rpartition("_%H_%M_%S")
+    if not suffix or rest or '%' in prefix:
+        return None
+    return prefix
+
+
+def _resolve_hdf(name: str | None, path: str | None, template: str | None) -> tuple[str, str]:
+    """
+    Get the HDF5 file name and path to use in a scan.
 
+    The file name is 'name' (or 'template', if not given) formatted with the current time,
+    and the path is 'path', defaulting to the current working directory.
+    """
+    template = name or template
+
+    now = datetime.datetime.now()
+    prefix = _hdf_template_prefix(template)
+    if prefix is None:
+        hdf_file_name = now.strftime(template)
+    else:
+        hdf_file_name = f"{prefix}_{now.hour:02d}_{now.minute:02d}_{now.second:02d}"
 
-if remote_control_available:
-    from bluesky_queueserver_api.item import BPlan
+    hdf_file_path = path
+    if hdf_file_path is None:
+        hdf_file_path = os.getcwd()
+
+    return hdf_file_name, hdf_file_path
 
 
 class _HDFBaseScanCLI:
     def add_hdf_arguments(self, parser):
-        parser.add_argument("--hdf_file_name", type=str, nargs='?', default=None, help="Save file name for the data HDF5 file generated (if using an AreaDetector). Defaults to 'ascan_hour_minute_second_scanid.h5'.")
-        parser.add_argument("--hdf_file_path", type=str, nargs='?', default=None, help="Save path for the data HDF5 file generated (if using an AreaDetector). Defaults to CWD.")
+        parser.add_argument("--hdf_file_name", type=str, nargs='?', default=None, help=_HDF_FILE_NAME_HELP)
+        parser.add_argument("--hdf_file_path", type=str, nargs='?', default=None, help=_HDF_FILE_PATH_HELP)
 
         return parser
 
     def parse_hdf_args(self, parsed_namespace, template: str | None = None):
-        template = parsed_namespace.hdf_file_name or template
-
-        from datetime import datetime
-        hdf_file_name = datetime.now().strftime(template)
-
-        hdf_file_path = parsed_namespace.hdf_file_path
-        if hdf_file_path is None:
-            hdf_file_path = os.getcwd()
-
-        return hdf_file_name, hdf_file_path
+        return _resolve_hdf(parsed_namespace.hdf_file_name, parsed_namespace.hdf_file_path, template)
 
 
 class _AfterBaseScanCLI:
@@ -40,16 +130,25 @@ class _AfterBaseScanCLI:
 
         return parser
 
+    def get_after_plan_arguments(self, parsed_namespace):
+        """Get both the after plan behavior and target arguments, as a (behavior, target) tuple."""
+        behavior = "max" if parsed_namespace.max else "return"
+        return behavior, self.get_after_plan_target_argument(parsed_namespace)
+
     def get_after_plan_behavior_argument(self, parsed_namespace):
         if parsed_namespace.max:
             return "max"
         return "return"
 
     def get_after_plan_target_argument(self, parsed_namespace):
-        if not parsed_namespace.plan_target:
-            if len(parsed_namespace.detectors) == 1:
-                return parsed_namespace.detectors[0]
-        return parsed_namespace.plan_target
+        target = parsed_namespace.plan_target
+        if target:
+            return target
+
+        detectors = parsed_namespace.detectors
+        if len(detectors) == 1:
+            return detectors[0]
+        return target
 
 
 class _BeforeBaseScanCLI:
@@ -68,13 +167,23 @@ class _BeforeBaseScanCLI:
         return None
 
     def get_before_plan_target_argument(self, parsed_namespace):
-        if not parsed_namespace.plan_target:
-            if len(parsed_namespace.detectors) == 1:
-                return parsed_namespace.detectors[0]
-        return parsed_namespace.plan_target
+        target = parsed_namespace.plan_target
+        if target:
+            return target
 
+        detectors = parsed_namespace.detectors
+        if len(detectors) == 1:
+            return detectors[0]
+        return target
+
+
+class BaseScanCLI(_CachedParserCLI, PlanCLI, _HDFBaseScanCLI, _AfterBaseScanCLI):
+    # Extra help text appended to the plan description, e.g. example usages.
+    _examples = ""
+
+    def _description(self):
+        return super()._description() + self._examples
 
-class BaseScanCLI(PlanCLI, _HDFBaseScanCLI, _AfterBaseScanCLI):
     def create_parser(self):
         _a = super().create_parser()
 
@@ -83,6 +192,38 @@ class BaseScanCLI(PlanCLI, _HDFBaseScanCLI, _AfterBaseScanCLI):
 
         return _a
 
+    def _create_grid_plan_arguments(self, parsed_namespace, local_ns, template: str, include_absolute: bool = True):
+        """Create the plan arguments shared by the 2D grid scans, with the HDF file name based on 'template'."""
+        detector = self.get_real_devices_if_needed(parsed_namespace.detectors, local_ns)
+        args = (
+            parsed_namespace.first_motor,
+            parsed_namespace.first_start,
+            parsed_namespace.first_stop,
+            parsed_namespace.first_num,
+            parsed_namespace.second_motor,
+            parsed_namespace.second_start,
+            parsed_namespace.second_stop,
+            parsed_namespace.second_num,
+        )
+        args, _, motor_names = self.parse_varargs(args, local_ns=local_ns)
+
+        exp_time = parsed_namespace.exposure_time
+        snake = parsed_namespace.snake
+
+        md = self.parse_md(*parsed_namespace.detectors, *motor_names, ns=parsed_namespace)
+
+        hdf_file_name, hdf_file_path = self.parse_hdf_args(parsed_namespace, template)
+
+        md.setdefault("metadata_save_file_location", hdf_file_path)
+
+        after_plan_behavior, after_plan_target = self.get_after_plan_arguments(parsed_namespace)
+
+        plan_args = (detector, *args)
+        plan_kwargs = dict(exposure_time=exp_time, snake_axes=snake, md=md, hdf_file_name=hdf_file_name, hdf_file_path=hdf_file_path, after_plan_behavior=after_plan_behavior, after_plan_target=after_plan_target)
+        if include_absolute:
+            plan_kwargs["absolute"] = self.absolute
+        return plan_args, plan_kwargs
+
 
 class PlanNDScan(BaseScanCLI):
     absolute: bool
@@ -96,21 +237,21 @@ class PlanNDScan(BaseScanCLI):
         _a.add_argument("args", nargs='+', type=str, help="Motor informations, in order (mnemonic start_position end_position)")
         # NOTE: These two are not used in parsing, they're only here for documentation. Their values are taken from args instead.
         _a.add_argument("num", type=int, nargs='?', default=None, help="Number of points between the start and end positions.")
-        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help="Per-point exposure time of the detector. Defaults to using the previously defined exposure time on the IOC.")
+        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help=_EXPOSURE_TIME_HELP)
 
         return _a
 
     def _create_plan_arguments(self, parsed_namespace, local_ns):
         detector = self.get_real_devices_if_needed(parsed_namespace.detectors, local_ns)
 
-        nargs = len(parsed_namespace.args)
+        _args = parsed_namespace.args
+        nargs = len(_args)
         assert (nargs >= 4) or (nargs % 3 == 0), "Not enough arguments have been passed."
         if nargs % 3 == 1:  # motors + num
-            _args = parsed_namespace.args
             exp_time = None
         else:  # motors + num + exp time
-            _args = parsed_namespace.args[:-1]
-            exp_time = float(parsed_namespace.args[-1])
+            exp_time = float(_args[-1])
+            _args = _args[:-1]
 
         args, num, motors = self.parse_varargs(_args, local_ns, with_final_num=True)
 
@@ -119,11 +260,9 @@ class PlanNDScan(BaseScanCLI):
         base_name = "ascan" if self.absolute else "rscan"
         hdf_file_name, hdf_file_path = self.parse_hdf_args(parsed_namespace, f"{base_name}_%H_%M_%S")
 
-        if "metadata_save_file_location" not in md:
-            md["metadata_save_file_location"] = hdf_file_path
+        md.setdefault("metadata_save_file_location", hdf_file_path)
 
-        after_plan_behavior = self.get_after_plan_behavior_argument(parsed_namespace)
-        after_plan_target = self.get_after_plan_target_argument(parsed_namespace)
+        after_plan_behavior, after_plan_target = self.get_after_plan_arguments(parsed_namespace)
 
         plan_args = (detector, *args)
         plan_kwargs = dict(number_of_points=num, exposure_time=exp_time, md=md, hdf_file_name=hdf_file_name, hdf_file_path=hdf_file_path, absolute=self.absolute, after_plan_behavior=after_plan_behavior, after_plan_target=after_plan_target)
@@ -140,73 +279,84 @@ class PlanNDListScan(BaseScanCLI):
         a variable substitutions with '$').
         """
 
-        def __init__(self, *args, **kwargs):
-            super().__init__(*args, **kwargs)
-
-            self._current_partial_list = None
-
-        def maybe_fill_partial_list(self, value: str) -> tuple[bool, typing.Iterable | None]:
+        _POSITION_START_CHARS = frozenset("+-.0123456789")
+
+        # Matches a single value of the joined input (or a list of positions spanning
+        # several values), followed by the separator between values.
+        _VALUE_SEPARATOR = '\x1f'
+        _VALUE_RE = re.compile(r"""
+            (?:
+                (?P<list>[\[(][^\])]*[\])])           # A list of positions
+              | (?P<position>[-+.\d][^\x1f]*)         # A single position
+              | (?P<positioner>[^\x1f\[(][^\x1f]*)    # Anything else is a positioner name
+            )
+            (?:\x1f|$)
+        """, re.VERBOSE)
+
+        @staticmethod
+        def parse_position(value: str) -> float | None:
+            """Parse a single position, or return None if 'value' is not a number (e.g. a positioner name)."""
+            try:
+                return float(value)
+            except ValueError:
+                return None
+
+        @staticmethod
+        def parse_position_list(value: str) -> list[float]:
             """
-            If detected, reassemble an input list of positions.
-
-            Parameters
-            ----------
-            value : str
-                The inputted value at the current location.
-
-            Returns
-            -------
-            tuple of boolean and an iterable or None. The boolean represents whether
-            the current value is detected as being a part of a list, and the iterable
-            is filled with the full list of parsed positions when the last item is
-            retrieved.
-            """
-            if value.startswith(('[', '(')):
-                self._current_partial_list = [value]
-                return True, None
-
-            if value.endswith((']', ')')):
-                self._current_partial_list.append(value)
-                full_positions = [float(x) for x in eval(''.join(self._current_partial_list))]
-                self._current_partial_list = None
-                return True, full_positions
+            Parse a list of positions (e.g. '[1, 2, 3]' or '(1, 2, 3)').
 
-            if self._current_partial_list is not None:
-                self._current_partial_list.append(value)
-                return True, None
+            Plain numeric lists are split directly, without going through the
+            Python compiler. Anything else is handled by 'ast.literal_eval'.
+            """
+            try:
+                return [float(x) for x in value[1:-1].split(',') if x.strip()]
+            except ValueError:
+                pass
 
-            return False, None
+            try:
+                return [float(x) for x in ast.literal_eval(value)]
+            except (ValueError, TypeError, SyntaxError):
+                raise Exception(f"Could not parse '{value}' as a list of positions.") from None
 
         def __call__(self, parser, namespace, values, option_string):
-            motor_positions = defaultdict(lambda: [])
+            # Every position needs a positioner before it, so it's enough to check the very first value.
+            first_value = values[0]
+            if first_value[:1] in self._POSITION_START_CHARS or first_value.startswith(('[', '(')) or self.parse_position(first_value) is not None:
+                raise Exception("You need to specify a motor device before the list of positions.")
+
+            motor_positions = defaultdict(list)
 
             current_positioner = None
 
-            for value in values:
-                try:
-                    # Is it a position value?
-                    value = float(value)
-                except ValueError:
-                    # Not a position value, discover what it is.
-
-                    # A partial list item
-                    filling_partial_list, full_position_list = self.maybe_fill_partial_list(value)
-                    if filling_partial_list:
-                        if full_position_list is not None:
-                            motor_positions[current_positioner].extend(full_position_list)
-                        continue
-
-                    # A positioner name
-                    current_positioner = value
+            # Scan all values in a single pass, so that lists split over several values (e.g. '[1,', '2]') come out whole.
+            joined = self._VALUE_SEPARATOR.join(values)
+            pos, end = 0, len(joined)
+            while pos < end:
+                match = self._VALUE_RE.match(joined, pos)
+                if match is None:
+                    raise Exception(f"Could not parse the positions starting at '{joined[pos:].replace(self._VALUE_SEPARATOR, ' ')}'.")
+                pos = match.end()
+
+                if (positioner := match["positioner"]) is not None:
+                    # Values like 'inf' or 'nan' don't look like numbers, but are still positions.
+                    if (position := self.parse_position(positioner)) is None:
+                        current_positioner = positioner
+                    else:
+                        motor_positions[current_positioner].append(position)
+                elif (position := match["position"]) is not None:
+                    if (parsed_position := self.parse_position(position)) is None:
+                        raise Exception(f"Could not parse '{position}' as a position.")
+                    motor_positions[current_positioner].append(parsed_position)
                 else:
-                    # Is a position value, append it.
-                    if current_positioner is None:
-                        raise Exception("You need to specify a motor device before the list of positions.")
-                    motor_positions[current_positioner].append(value)
+                    position_list = match["list"].replace(self._VALUE_SEPARATOR, '')
+                    motor_positions[current_positioner].extend(self.parse_position_list(position_list))
 
-            namespace.args = []
+            args = []
             for positioner, positions in motor_positions.items():
-                namespace.args.extend([positioner, tuple(positions)])
+                args.append(positioner)
+                args.append(tuple(positions))
+            namespace.args = args
 
     def _usage(self):
         return "%(prog)s motor positions [motor positions ...] [-t exposure_time]"
@@ -215,7 +365,7 @@ class PlanNDListScan(BaseScanCLI):
         _a = super().create_parser()
 
         _a.add_argument("args", nargs='+', action=self.RangeAction, type=str, help="Motor informations, in order (mnemonic positions)")
-        _a.add_argument("-t", "--exposure_time", type=float, nargs='?', default=None, help="Per-point exposure time of the detector. Defaults to using the previously defined exposure time on the IOC.")
+        _a.add_argument("-t", "--exposure_time", type=float, nargs='?', default=None, help=_EXPOSURE_TIME_HELP)
 
         return _a
 
@@ -230,11 +380,9 @@ class PlanNDListScan(BaseScanCLI):
         base_name = "list_ascan" if self.absolute else "list_rscan"
         hdf_file_name, hdf_file_path = self.parse_hdf_args(parsed_namespace, f"{base_name}_%H_%M_%S")
 
-        if "metadata_save_file_location" not in md:
-            md["metadata_save_file_location"] = hdf_file_path
+        md.setdefault("metadata_save_file_location", hdf_file_path)
 
-        after_plan_behavior = self.get_after_plan_behavior_argument(parsed_namespace)
-        after_plan_target = self.get_after_plan_target_argument(parsed_namespace)
+        after_plan_behavior, after_plan_target = self.get_after_plan_arguments(parsed_namespace)
 
         plan_args = (detector, *args)
         plan_kwargs = dict(exposure_time=exp_time, md=md, hdf_file_name=hdf_file_name, hdf_file_path=hdf_file_path, absolute=self.absolute, after_plan_behavior=after_plan_behavior, after_plan_target=after_plan_target)
@@ -250,57 +398,28 @@ class PlanGridScan(BaseScanCLI):
     def create_parser(self):
         _a = super().create_parser()
 
-        _a.add_argument("first_motor", nargs=1, type=str, help="Mnemonic of the motor on the slowest axis to move.")
-        _a.add_argument("first_start", type=float, help="Start position of the first motor, in the motor's EGU.")
-        _a.add_argument("first_stop", type=float, help="End position of the first motor, in the motor's EGU.")
-        _a.add_argument("first_num", type=int, help="Number of points between the start and end positions of the first motor.")
-        _a.add_argument("second_motor", nargs=1, type=str, help="Mnemonic of the motor on the second slowest axis to move.")
-        _a.add_argument("second_start", type=float, help="Start position of the second motor, in the motor's EGU.")
-        _a.add_argument("second_stop", type=float, help="End position of the second motor, in the motor's EGU.")
-        _a.add_argument("second_num", type=int, help="Number of points between the start and end positions of the second motor.")
-        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help="Per-point exposure time of the detector. Defaults to using the previously defined exposure time on the IOC.")
-        _a.add_argument("-s", "--snake", action="store_true", help="Whether to snake axes or not. The default behavior is to not snake.")
+        _a.add_argument("first_motor", type=str, help=_FIRST_MOTOR_HELP)
+        _a.add_argument("first_start", type=float, help=_FIRST_START_HELP)
+        _a.add_argument("first_stop", type=float, help=_FIRST_STOP_HELP)
+        _a.add_argument("first_num", type=int, help=_FIRST_NUM_HELP)
+        _a.add_argument("second_motor", type=str, help=_SECOND_MOTOR_HELP)
+        _a.add_argument("second_start", type=float, help=_SECOND_START_HELP)
+        _a.add_argument("second_stop", type=float, help=_SECOND_STOP_HELP)
+        _a.add_argument("second_num", type=int, help=_SECOND_NUM_HELP)
+        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help=_EXPOSURE_TIME_HELP)
+        _a.add_argument("-s", "--snake", action="store_true", help=_SNAKE_HELP)
 
         return _a
 
     def _create_plan_arguments(self, parsed_namespace, local_ns):
-        detector = self.get_real_devices_if_needed(parsed_namespace.detectors, local_ns)
-        args = [
-            parsed_namespace.first_motor[0],
-            parsed_namespace.first_start,
-            parsed_namespace.first_stop,
-            parsed_namespace.first_num,
-            parsed_namespace.second_motor[0],
-            parsed_namespace.second_start,
-            parsed_namespace.second_stop,
-            parsed_namespace.second_num,
-        ]
-        args, _, motor_names = self.parse_varargs(args, local_ns=local_ns)
-
-        exp_time = parsed_namespace.exposure_time
-        snake = parsed_namespace.snake
-
-        md = self.parse_md(*parsed_namespace.detectors, *motor_names, ns=parsed_namespace)
-
-        hdf_file_name, hdf_file_path = self.parse_hdf_args(parsed_namespace, "gridscan_%H_%M_%S")
-
-        if "metadata_save_file_location" not in md:
-            md["metadata_save_file_location"] = hdf_file_path
-
-        after_plan_behavior = self.get_after_plan_behavior_argument(parsed_namespace)
-        after_plan_target = self.get_after_plan_target_argument(parsed_namespace)
-
-        plan_args = (detector, *args)
-        plan_kwargs = dict(exposure_time=exp_time, snake_axes=snake, md=md, hdf_file_name=hdf_file_name, hdf_file_path=hdf_file_path, absolute=self.absolute, after_plan_behavior=after_plan_behavior, after_plan_target=after_plan_target)
-        return plan_args, plan_kwargs
+        return self._create_grid_plan_arguments(parsed_namespace, local_ns, "gridscan_%H_%M_%S")
 
 
 class PlanGridScanWithJitter(BaseScanCLI):
     def _usage(self):
         return "%(prog)s motor start stop num motor start stop num [motor start stop num ...] [exposure_time] [-s/--snake]"
 
-    def _description(self):
-        return super()._description() + """
+    _examples = """
 
 Example usages:
 
@@ -340,74 +459,45 @@ jittermap ms2r 0.488 0.49 3 ms2l 0.49 0.494 3 0.1 -s
     def create_parser(self):
         _a = super().create_parser()
 
-        _a.add_argument("first_motor", nargs=1, type=str, help="Mnemonic of the motor on the slowest axis to move.")
-        _a.add_argument("first_start", type=float, help="Start position of the first motor, in the motor's EGU.")
-        _a.add_argument("first_stop", type=float, help="End position of the first motor, in the motor's EGU.")
-        _a.add_argument("first_num", type=int, help="Number of points between the start and end positions of the first motor.")
-        _a.add_argument("second_motor", nargs=1, type=str, help="Mnemonic of the motor on the second slowest axis to move.")
-        _a.add_argument("second_start", type=float, help="Start position of the second motor, in the motor's EGU.")
-        _a.add_argument("second_stop", type=float, help="End position of the second motor, in the motor's EGU.")
-        _a.add_argument("second_num", type=int, help="Number of points between the start and end positions of the second motor.")
-        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help="Per-point exposure time of the detector. Defaults to using the previously defined exposure time on the IOC.")
-        _a.add_argument("-s", "--snake", action="store_true", help="Whether to snake axes or not. The default behavior is to not snake.")
+        _a.add_argument("first_motor", type=str, help=_FIRST_MOTOR_HELP)
+        _a.add_argument("first_start", type=float, help=_FIRST_START_HELP)
+        _a.add_argument("first_stop", type=float, help=_FIRST_STOP_HELP)
+        _a.add_argument("first_num", type=int, help=_FIRST_NUM_HELP)
+        _a.add_argument("second_motor", type=str, help=_SECOND_MOTOR_HELP)
+        _a.add_argument("second_start", type=float, help=_SECOND_START_HELP)
+        _a.add_argument("second_stop", type=float, help=_SECOND_STOP_HELP)
+        _a.add_argument("second_num", type=int, help=_SECOND_NUM_HELP)
+        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help=_EXPOSURE_TIME_HELP)
+        _a.add_argument("-s", "--snake", action="store_true", help=_SNAKE_HELP)
 
         return _a
 
-    def _create_plan(self, parsed_namespace, local_ns):
-        detector = self.get_real_devices_if_needed(parsed_namespace.detectors, local_ns)
-        args = [
-            parsed_namespace.first_motor[0],
-            parsed_namespace.first_start,
-            parsed_namespace.first_stop,
-            parsed_namespace.first_num,
-            parsed_namespace.second_motor[0],
-            parsed_namespace.second_start,
-            parsed_namespace.second_stop,
-            parsed_namespace.second_num,
-        ]
-        args, _, motor_names = self.parse_varargs(args, local_ns=local_ns)
-
-        exp_time = parsed_namespace.exposure_time
-        snake = parsed_namespace.snake
-
-        md = self.parse_md(*parsed_namespace.detectors, *motor_names, ns=parsed_namespace)
-
-        hdf_file_name, hdf_file_path = self.parse_hdf_args(parsed_namespace, "jittermap_%H_%M_%S")
-
-        if "metadata_save_file_location" not in md:
-            md["metadata_save_file_location"] = hdf_file_path
-
-        after_plan_behavior = self.get_after_plan_behavior_argument(parsed_namespace)
-        after_plan_target = self.get_after_plan_target_argument(parsed_namespace)
-
-        if self._mode_of_operation == ModeOfOperation.Local:
-            return functools.partial(self._plan, detector, *args, exposure_time=exp_time, snake_axes=snake, md=md, hdf_file_name=hdf_file_name, hdf_file_path=hdf_file_path, after_plan_behavior=after_plan_behavior, after_plan_target=after_plan_target)
-        if self._mode_of_operation == ModeOfOperation.Remote:
-            return BPlan(self._plan_name, detector, *args, exposure_time=exp_time, snake_axes=snake, md=md, hdf_file_name=hdf_file_name, hdf_file_path=hdf_file_path, after_plan_behavior=after_plan_behavior, after_plan_target=after_plan_target)
+    def _create_plan_arguments(self, parsed_namespace, local_ns):
+        return self._create_grid_plan_arguments(parsed_namespace, local_ns, "jittermap_%H_%M_%S", include_absolute=False)
 
 
-class PlanMotorOrigin(PlanCLI):
+class PlanMotorOrigin(_CachedParserCLI, PlanCLI):
     def _usage(self):
         return "%(prog)s motor [position]"
 
     def create_parser(self):
         _a = super().create_parser()
 
-        _a.add_argument("motor", nargs=1, type=str, help="Mnemonic of a motor to set the origin of.")
+        _a.add_argument("motor", type=str, help="Mnemonic of a motor to set the origin of.")
         _a.add_argument("position", type=float, help="Position of the motor to set as origin. Default: current position.", default=None, nargs='?')
 
         return _a
 
     def _create_plan_arguments(self, parsed_namespace, local_ns):
-        motor = self.get_real_devices_if_needed(parsed_namespace.motor, local_ns)[0]
+        motor = self.get_real_devices_if_needed([parsed_namespace.motor], local_ns)[0]
         position = parsed_namespace.position
 
-        md = self.parse_md(parsed_namespace.motor[0], ns=parsed_namespace)
+        md = self.parse_md(parsed_namespace.motor, ns=parsed_namespace)
 
         return (motor, position), {"md": md}
 
 
-class PlanCT(PlanCLI, _HDFBaseScanCLI):
+class PlanCT(_CachedParserCLI, PlanCLI, _HDFBaseScanCLI):
     def _usage(self):
         return "%(prog)s number_of_points [exposure_time]"
 
@@ -417,7 +507,7 @@ class PlanCT(PlanCLI, _HDFBaseScanCLI):
         _a = self.add_hdf_arguments(_a)
 
         _a.add_argument("number_of_points", type=int, nargs='?', default=None, help="Number of acquisitions to take.")
-        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help="Per-point exposure time of the detector. Defaults to using the previously defined exposure time on the IOC.")
+        _a.add_argument("exposure_time", type=float, nargs='?', default=None, help=_EXPOSURE_TIME_HELP)
 
         return _a
 
@@ -430,14 +520,13 @@ class PlanCT(PlanCLI, _HDFBaseScanCLI):
 
         hdf_file_name, hdf_file_path = self.parse_hdf_args(parsed_namespace, "ct_%H_%M_%S")
 
-        if "metadata_save_file_location" not in md:
-            md["metadata_save_file_location"] = hdf_file_path
+        md.setdefault("metadata_save_file_location", hdf_file_path)
 
         plan_kwargs = dict(number_of_points=number_of_points, exposure_time=exposure_time, md=md, hdf_file_name=hdf_file_name, hdf_file_path=hdf_file_path)
         return (detector,), plan_kwargs
 
 
-class PlanMV(PlanCLI, _BeforeBaseScanCLI):
+class PlanMV(_CachedParserCLI, PlanCLI, _BeforeBaseScanCLI):
     def _usage(self):
         return "%(prog)s motor position [...] OR motors --max"
 
@@ -468,8 +557,7 @@ class PlanMV(PlanCLI, _BeforeBaseScanCLI):
 class PlanAbsNDScan(PlanNDScan):
     absolute = True
 
-    def _description(self):
-        return super()._description() + """
+    _examples = """
 
 Example usages:
 
@@ -508,8 +596,7 @@ ascan ms2r 0.488 0.49 wst 0.0 0.4 5 0.1
 class PlanRelNDScan(PlanNDScan):
     absolute = False
 
-    def _description(self):
-        return super()._description() + """
+    _examples = """
 
 Example usages:
 
@@ -548,8 +635,7 @@ rscan ms2r 0.488 0.49 wst 0.0 0.4 5 0.1
 class PlanAbsNDListScan(PlanNDListScan):
     absolute = True
 
-    def _description(self):
-        return super()._description() + """
+    _examples = """
 
 Example usages:
 
@@ -587,8 +673,7 @@ list_ascan ms2r [1, 2, 3] wst 0.0 0.2 0.4 -t 0.1
 class PlanRelNDListScan(PlanNDListScan):
     absolute = False
 
-    def _description(self):
-        return super()._description() + """
+    _examples = """
 
 Example usages:
 
@@ -626,8 +711,7 @@ list_rscan ms2r [1, 2, 3] wst 0.0 0.2 0.4 -t 0.1
 class PlanAbsGridScan(PlanGridScan):
     absolute = True
 
-    def _description(self):
-        return super()._description() + """
+    _examples = """
 
 Example usages:
 
@@ -668,8 +752,7 @@ grid_scan ms2r 0.488 0.49 3 ms2l 0.49 0.494 3 0.1 -s
 class PlanRelGridScan(PlanGridScan):
     absolute = False
 
-    def _description(self):
-        return super()._description() + """
+    _examples = """
 
 Example usages:
 
@@ -707,6 +790,24 @@ rel_grid_scan ms2r 0.488 0.49 3 ms2l 0.49 0.494 3 0.1 -s
 """
 
 
+def _uses_vortex(detector_names):
+    """Whether any of the given detector mnemonics refers to a Vortex detector."""
+    return any(token in name for name in detector_names for token in _VORTEX_TOKENS)
+
+
+def _offset_energy_ranges(energy_ranges, relative_to):
+    """
+    Offset the start and end positions of the ranges populated by EScanRangeAction by 'relative_to'.
+
+    Returns an empty list when no range was given, and the ranges themselves when there's no offset.
+    """
+    if not energy_ranges:
+        return []
+    if relative_to == 0:
+        return energy_ranges
+    return [(idx, start + relative_to, stop + relative_to, step) for idx, start, stop, step in energy_ranges]
+
+
 class EScanRangeAction(argparse.Action):
     """
     Custom argparse Action to parse energy and k-space ranges.
@@ -722,88 +823,87 @@ class EScanRangeAction(argparse.Action):
         (range index, start position (can be None), end position, step)
     """
 
+    # Option string -> (namespace attribute, accepted number of values, error message on other amounts)
+    _SPEC = {
+        "-e": ("e", (3,), "Can only specify an energy range with 3 values, not {}."),
+        "-k": ("k", (2, 3), "Can only specify a k-space range with 2 ou 3 values, not {}."),
+    }
+
     def __call__(self, parser, namespace, values, option_string):
         if not hasattr(namespace, "_current_range_index"):
             namespace._current_range_index = 0
 
-        match option_string:
-            case "-e":
-                if namespace.e is None:
-                    namespace.e = []
+        dest, accepted_n_values, error_message = self._SPEC[option_string]
 
-                n_values = len(values)
-                if n_values == 3:
-                    namespace.e.append(tuple([namespace._current_range_index, *values]))
-                else:
-                    raise Exception(f"Can only specify an energy range with 3 values, not {n_values}.")
-
-            case "-k":
-                if namespace.k is None:
-                    namespace.k = []
-
-                n_values = len(values)
-                if n_values == 2:
-                    if namespace._current_range_index == 0:
-                        raise Exception("You need to specify a range with a start position before specifying one without.")
-                    namespace.k.append(tuple([namespace._current_range_index, None, *values]))
-                elif n_values == 3:
-                    namespace.k.append(tuple([namespace._current_range_index, *values]))
-                else:
-                    raise Exception(f"Can only specify a k-space range with 2 ou 3 values, not {n_values}.")
+        n_values = len(values)
+        if n_values not in accepted_n_values:
+            raise Exception(error_message.format(n_values))
+
+        ranges = getattr(namespace, dest)
+        if ranges is None:
+            ranges = []
+            setattr(namespace, dest, ranges)
+
+        if n_values == 2:
+            if namespace._current_range_index == 0:
+                raise Exception("You need to specify a range with a start position before specifying one without.")
+            ranges.append((namespace._current_range_index, None, *values))
+        else:
+            ranges.append((namespace._current_range_index, *values))
 
         namespace._current_range_index += 1
 
 
-class PlanEScan(BaseScanCLI):
+class _EnergyRangesScanCLI:
+    def add_energy_range_arguments(self, parser):
+        parser.add_argument("-e", nargs="+", type=float, action=EScanRangeAction, help=_ENERGY_RANGE_HELP)
+        parser.add_argument("-r", "--relative_to", type=float, default=0, help=_RELATIVE_TO_HELP)
+        parser.add_argument("-k", nargs="+", type=float, action=EScanRangeAction, help=_K_RANGE_HELP)
+
+        return parser
+
+
+class PlanEScan(BaseScanCLI, _EnergyRangesScanCLI):
     def _usage(self):
         return "%(prog)s [-e start stop step] [-r energy] [-k [start] stop step] [-e0 initial_energy] [-t acquisition_time] [-st settling_time]"
 
     def create_parser(self):
         _a = super().create_parser()
 
-        _a.add_argument("-e", nargs="+", type=float, action=EScanRangeAction, help="Specify an energy range (in eV), with a step size (in eV).")
-        _a.add_argument("-r", "--relative_to", type=float, default=0, help="Calculate all energies relative to this one, in eV.")
-        _a.add_argument("-k", nargs="+", type=float, action=EScanRangeAction, help="Specify a K-space range (start stop step_size).")
+        _a = self.add_energy_range_arguments(_a)
 
-        _a.add_argument("-e0", "--initial_energy", type=float, help="Initial energy value, in eV.")
+        _a.add_argument("-e0", "--initial_energy", type=float, help=_INITIAL_ENERGY_HELP)
 
-        _a.add_argument("-st", "--settling_time", type=int, default=250, help="Time (ms) to wait after DCM movement for settling. Default: 250ms")
-        _a.add_argument("-t", "--acquisition_time", type=int, default=1000, help="Time (ms) for each acquisition pulse. Default: 1000ms")
+        _a.add_argument("-st", "--settling_time", type=int, default=250, help=_SETTLING_TIME_HELP)
+        _a.add_argument("-t", "--acquisition_time", type=int, default=1000, help=_ACQUISITION_TIME_HELP)
 
-        _a.add_argument("--no-use-undulator", action="store_true", help="Don't change undulator parameters in this plan.")
-        _a.add_argument("--no-use-crio01", action="store_true", help="Don't change or trigger CRIO01 parameters in this plan.")
-        _a.add_argument("--no-use-crio02", action="store_true", help="Don't change or trigger CRIO02 parameters in this plan.")
+        _a.add_argument("--use-undulator", action=argparse.BooleanOptionalAction, default=True, help=_USE_UNDULATOR_HELP)
+        _a.add_argument("--use-crio01", action=argparse.BooleanOptionalAction, default=True, help=_USE_CRIO01_HELP)
+        _a.add_argument("--use-crio02", action=argparse.BooleanOptionalAction, default=True, help=_USE_CRIO02_HELP)
 
         return _a
 
     def _create_plan_arguments(self, parsed_namespace, local_ns):
-        if len(parsed_namespace.detectors) == 0:
-            parsed_namespace.detectors = ["i0c", "i1c"]
-        parsed_namespace.detectors.extend(["dcm_energy"])
-        use_vortex = any("xrf" in det for det in parsed_namespace.detectors)
+        detector_names = [*(parsed_namespace.detectors or _ESCAN_DEFAULT_DETECTORS), "dcm_energy"]
+        use_vortex = _uses_vortex(detector_names)
 
-        detectors = self.get_real_devices_if_needed(parsed_namespace.detectors, local_ns)
+        detectors = self.get_real_devices_if_needed(detector_names, local_ns)
 
-        energy_ranges = parsed_namespace.e
-        if energy_ranges is None:
-            energy_ranges = []
+        energy_ranges = _offset_energy_ranges(parsed_namespace.e, parsed_namespace.relative_to)
         k_ranges = parsed_namespace.k
         if k_ranges is None:
             k_ranges = []
 
-        r = parsed_namespace.relative_to
-        energy_ranges = [(idx, x + r, y + r, s) for idx, x, y, s in energy_ranges]
-
         initial_energy = parsed_namespace.initial_energy
 
         settle_time = parsed_namespace.settling_time
         acq_time = parsed_namespace.acquisition_time
 
-        use_undulator = not parsed_namespace.no_use_undulator
-        use_crio01 = not parsed_namespace.no_use_crio01
-        use_crio02 = not parsed_namespace.no_use_crio02
+        use_undulator = parsed_namespace.use_undulator
+        use_crio01 = parsed_namespace.use_crio01
+        use_crio02 = parsed_namespace.use_crio02
 
-        md = self.parse_md(*parsed_namespace.detectors, ns=parsed_namespace)
+        md = self.parse_md(*detector_names, ns=parsed_namespace)
 
         if "metadata_save_file_location" not in md:
             md["metadata_save_file_location"] = os.getcwd()
@@ -825,40 +925,33 @@ class PlanEScanFly(BaseScanCLI):
         _a = super().create_parser()
 
         _a.add_argument("-e", nargs="+", type=float, action=EScanRangeAction, help="Specify an energy range (in eV), with a velocity (in eV/s).")
-        _a.add_argument("-r", "--relative_to", type=float, default=0, help="Calculate all energies relative to this one, in eV.")
+        _a.add_argument("-r", "--relative_to", type=float, default=0, help=_RELATIVE_TO_HELP)
 
-        _a.add_argument("-st", "--settling_time", type=int, default=250, help="Time (ms) to wait after DCM movement for settling. Default: 250ms")
-        _a.add_argument("-t", "--acquisition_time", type=int, default=1000, help="Time (ms) for each acquisition pulse. Default: 1000ms")
+        _a.add_argument("-st", "--settling_time", type=int, default=250, help=_SETTLING_TIME_HELP)
+        _a.add_argument("-t", "--acquisition_time", type=int, default=1000, help=_ACQUISITION_TIME_HELP)
 
-        _a.add_argument("--no-use-undulator", action="store_true", help="Don't change undulator parameters in this plan.")
-        _a.add_argument("--no-use-crio01", action="store_true", help="Don't change or trigger CRIO01 parameters in this plan.")
-        _a.add_argument("--no-use-crio02", action="store_true", help="Don't change or trigger CRIO02 parameters in this plan.")
+        _a.add_argument("--use-undulator", action=argparse.BooleanOptionalAction, default=True, help=_USE_UNDULATOR_HELP)
+        _a.add_argument("--use-crio01", action=argparse.BooleanOptionalAction, default=True, help=_USE_CRIO01_HELP)
+        _a.add_argument("--use-crio02", action=argparse.BooleanOptionalAction, default=True, help=_USE_CRIO02_HELP)
 
         return _a
 
     def _create_plan_arguments(self, parsed_namespace, local_ns):
-        if len(parsed_namespace.detectors) == 0:
-            parsed_namespace.detectors = ["i0c", "i1c"]
-        parsed_namespace.detectors.extend(["dcm_energy"])
-        use_vortex = any("xrf" in det for det in parsed_namespace.detectors)
+        detector_names = [*(parsed_namespace.detectors or _ESCAN_DEFAULT_DETECTORS), "dcm_energy"]
+        use_vortex = _uses_vortex(detector_names)
 
-        detectors = self.get_real_devices_if_needed(parsed_namespace.detectors, local_ns)
+        detectors = self.get_real_devices_if_needed(detector_names, local_ns)
 
-        energy_ranges = parsed_namespace.e
-        if energy_ranges is None:
-            energy_ranges = []
-
-        r = parsed_namespace.relative_to
-        energy_ranges = [(idx, x + r, y + r, v) for idx, x, y, v in energy_ranges]
+        energy_ranges = _offset_energy_ranges(parsed_namespace.e, parsed_namespace.relative_to)
 
         settle_time = parsed_namespace.settling_time
         acq_time = parsed_namespace.acquisition_time
 
-        use_undulator = not parsed_namespace.no_use_undulator
-        use_crio01 = not parsed_namespace.no_use_crio01
-        use_crio02 = not parsed_namespace.no_use_crio02
+        use_undulator = parsed_namespace.use_undulator
+        use_crio01 = parsed_namespace.use_crio01
+        use_crio02 = parsed_namespace.use_crio02
 
-        md = self.parse_md(*parsed_namespace.detectors, ns=parsed_namespace)
+        md = self.parse_md(*detector_names, ns=parsed_namespace)
 
         if "metadata_save_file_location" not in md:
             md["metadata_save_file_location"] = os.getcwd()
@@ -872,7 +965,7 @@ class PlanEScanFly(BaseScanCLI):
         return plan_args, plan_kwargs
 
 
-class PlanMoveEnergy(PlanCLI):
+class PlanMoveEnergy(_CachedParserCLI, PlanCLI):
     def _usage(self):
         return "%(prog)s energy"
 
@@ -891,7 +984,7 @@ class PlanMoveEnergy(PlanCLI):
         return (energy,), {"md": md}
 
 
-class PlanGridEnergyScan(BaseScanCLI):
+class PlanGridEnergyScan(BaseScanCLI, _EnergyRangesScanCLI):
     absolute: bool
 
     def _usage(self):
@@ -900,79 +993,71 @@ class PlanGridEnergyScan(BaseScanCLI):
     def create_parser(self):
         _a = super().create_parser()
 
-        _a.add_argument("first_motor", nargs=1, type=str, help="Mnemonic of the motor on the slowest axis to move.")
-        _a.add_argument("first_start", type=float, help="Start position of the first motor, in the motor's EGU.")
-        _a.add_argument("first_stop", type=float, help="End position of the first motor, in the motor's EGU.")
+        _a.add_argument("first_motor", type=str, help=_FIRST_MOTOR_HELP)
+        _a.add_argument("first_start", type=float, help=_FIRST_START_HELP)
+        _a.add_argument("first_stop", type=float, help=_FIRST_STOP_HELP)
         _a.add_argument("first_num", type=int, help="Number of steps between the start and end positions of the first motor.")
-        _a.add_argument("second_motor", nargs=1, type=str, help="Mnemonic of the motor on the second slowest axis to move.")
-        _a.add_argument("second_start", type=float, help="Start position of the second motor, in the motor's EGU.")
-        _a.add_argument("second_stop", type=float, help="End position of the second motor, in the motor's EGU.")
+        _a.add_argument("second_motor", type=str, help=_SECOND_MOTOR_HELP)
+        _a.add_argument("second_start", type=float, help=_SECOND_START_HELP)
+        _a.add_argument("second_stop", type=float, help=_SECOND_STOP_HELP)
         _a.add_argument("second_num", type=int, help="Number of steps between the start and end positions of the second motor.")
-        _a.add_argument("-s", "--snake", action="store_true", help="Whether to snake axes or not. The default behavior is to not snake.")
+        _a.add_argument("-s", "--snake", action="store_true", help=_SNAKE_HELP)
 
-        _a.add_argument("-e", nargs="+", type=float, action=EScanRangeAction, help="Specify an energy range (in eV), with a step size (in eV).")
-        _a.add_argument("-r", "--relative_to", type=float, default=0, help="Calculate all energies relative to this one, in eV.")
-        _a.add_argument("-k", nargs="+", type=float, action=EScanRangeAction, help="Specify a K-space range (start stop step_size).")
+        _a = self.add_energy_range_arguments(_a)
 
-        _a.add_argument("-e0", "--initial_energy", type=float, help="Initial energy value, in eV.")
+        _a.add_argument("-e0", "--initial_energy", type=float, help=_INITIAL_ENERGY_HELP)
 
-        _a.add_argument("-st", "--settling_time", type=int, default=250, help="Time (ms) to wait after DCM movement for settling. Default: 250ms")
-        _a.add_argument("-t", "--acquisition_time", type=int, default=1000, help="Time (ms) for each acquisition pulse. Default: 1000ms")
+        _a.add_argument("-st", "--settling_time", type=int, default=250, help=_SETTLING_TIME_HELP)
+        _a.add_argument("-t", "--acquisition_time", type=int, default=1000, help=_ACQUISITION_TIME_HELP)
 
-        _a.add_argument("--no-use-undulator", action="store_true", help="Don't change undulator parameters in this plan.")
-        _a.add_argument("--no-use-crio01", action="store_true", help="Don't change or trigger CRIO01 parameters in this plan.")
-        _a.add_argument("--no-use-crio02", action="store_true", help="Don't change or trigger CRIO02 parameters in this plan.")
+        _a.add_argument("--use-undulator", action=argparse.BooleanOptionalAction, default=True, help=_USE_UNDULATOR_HELP)
+        _a.add_argument("--use-crio01", action=argparse.BooleanOptionalAction, default=True, help=_USE_CRIO01_HELP)
+        _a.add_argument("--use-crio02", action=argparse.BooleanOptionalAction, default=True, help=_USE_CRIO02_HELP)
 
         return _a
 
     def _create_plan_arguments(self, parsed_namespace, local_ns):
-        parsed_namespace.detectors.extend(["dcm_energy"])
-        use_vortex = any("xrf" in det for det in parsed_namespace.detectors)
+        detector_names = [*parsed_namespace.detectors, "dcm_energy"]
+        use_vortex = _uses_vortex(detector_names)
 
-        detectors = self.get_real_devices_if_needed(parsed_namespace.detectors, local_ns)
+        detectors = self.get_real_devices_if_needed(detector_names, local_ns)
 
-        args = [
-            parsed_namespace.first_motor[0],
+        args = (
+            parsed_namespace.first_motor,
             parsed_namespace.first_start,
             parsed_namespace.first_stop,
             parsed_namespace.first_num,
-            parsed_namespace.second_motor[0],
+            parsed_namespace.second_motor,
             parsed_namespace.second_start,
             parsed_namespace.second_stop,
             parsed_namespace.second_num,
-        ]
+        )
         args, _, motor_names = self.parse_varargs(args, local_ns=local_ns)
 
         snake = parsed_namespace.snake
 
-        energy_ranges = parsed_namespace.e
-        if energy_ranges is None:
-            energy_ranges = []
+        energy_ranges = _offset_energy_ranges(parsed_namespace.e, parsed_namespace.relative_to)
         k_ranges = parsed_namespace.k
         if k_ranges is None:
             k_ranges = []
 
-        r = parsed_namespace.relative_to
-        energy_ranges = [(idx, x + r, y + r, s) for idx, x, y, s in energy_ranges]
-
         initial_energy = parsed_namespace.initial_energy
 
         settle_time = parsed_namespace.settling_time
         acq_time = parsed_namespace.acquisition_time
 
-        use_undulator = not parsed_namespace.no_use_undulator
-        use_crio01 = not parsed_namespace.no_use_crio01
-        use_crio02 = not parsed_namespace.no_use_crio02
+        use_undulator = parsed_namespace.use_undulator
+        use_crio01 = parsed_namespace.use_crio01
+        use_crio02 = parsed_namespace.use_crio02
 
-        md = self.parse_md(*parsed_namespace.detectors, *motor_names, ns=parsed_namespace)
+        md = self.parse_md(*detector_names, *motor_names, ns=parsed_namespace)
 
         if "metadata_save_file_location" not in md:
             md["metadata_save_file_location"] = os.getcwd()
 
         hdf_file_name, hdf_file_path = self.parse_hdf_args(parsed_namespace, "energy_gridscan_%H_%M_%S")
 
-        after_plan_behavior = self.get_after_plan_behavior_argument(parsed_namespace)
-        after_plan_target = self.get_after_plan_target_argument(parsed_namespace)
+        after_plan_behavior, after_plan_target = self.get_after_plan_arguments(parsed_namespace)
 
         plan_args = (detectors, *args)
         plan_kwargs = dict(
@@ -1,3 +1,4 @@
+import functools
 import os
 
 from sophys.cli.core import HTTPSERVER_HOST_ENVVAR, HTTPSERVER_PORT_ENVVAR, get_cli_envvar
@@ -19,6 +20,16 @@ PLAN_WHITELIST = PlanWhitelist(*[
 ])
 
 
+@functools.cache
+def _local_plan_names():
+    """
+    User names of the whitelisted plans available locally, discovered only once per import.
+
+    This is reused across '%unload_ext' / '%load_ext', but '%reload_ext' re-imports this module, discovering them again.
+    """
+    return frozenset(i[0].user_name for i in get_plans("test", PLAN_WHITELIST))
+
+
 def load_ipython_extension(ipython):
     local_mode = get_from_namespace(NamespaceKeys.LOCAL_MODE, False, ipython)
     mode_of_op = ModeOfOperation.Local if local_mode else ModeOfOperation.Remote
@@ -38,8 +49,7 @@ def load_ipython_extension(ipython):
         port = get_cli_envvar(HTTPSERVER_PORT_ENVVAR)
         setup_remote_session_handler(ipython, f"http://{host}:{port}")
     else:
-        plans = set(i[0].user_name for i in get_plans("test", PLAN_WHITELIST))
-        add_to_namespace(NamespaceKeys.PLANS, plans, ipython=ipython)
+        add_to_namespace(NamespaceKeys.PLANS, set(_local_plan_names()), ipython=ipython)
 
 
 def unload_ipython_extension(ipython):
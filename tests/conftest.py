@@ -3,6 +3,6 @@ import pathlib
 import pytest
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_data_location():
     return str(pathlib.Path(__file__).parent / "test_data") + '/'
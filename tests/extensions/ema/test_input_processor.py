@@ -6,7 +6,15 @@ from sophys.cli.extensions.ema import whitelisted_plan_list
 from sophys.cli.extensions.ema.input_processor import add_detectors, add_metadata, add_plan_target, input_processor
 
 
-@pytest.fixture
+_SCAN_INFO = PlanInformation("scan", "scan", None)
+_SCAN_INFO_WITH_DETECTORS = PlanInformation("scan", "scan", None, has_detectors=True)
+_SCAN_INFO_WITHOUT_DETECTORS = PlanInformation("scan", "scan", None, has_detectors=False)
+_SUPER_SCAN_INFO = PlanInformation("super_scan", "scan", None)
+_SUPER_SCAN_INFO_WITH_DETECTORS = PlanInformation("super_scan", "scan", None, has_detectors=True)
+_SUPER_SCAN_INFO_WITHOUT_DETECTORS = PlanInformation("super_scan", "scan", None, has_detectors=False)
+
+
+@pytest.fixture(scope="session")
 def local_data_source(test_data_location):
     return LocalFileDataSource(test_data_location + "ema_input_processor_data_source.csv")
 
@@ -29,22 +37,22 @@ def test_local_data_source_get(local_data_source):
         ("scan -mvs1 -1 1 10 0.1", "scan -mvs1 -1 1 10 0.1 -d abc1 abc2 abc3"),
         ("%scan -mvs1 -1 1 10 0.1", "%scan -mvs1 -1 1 10 0.1 -d abc1 abc2 abc3"),
         ("super_scan whatever whatever", "super_scan whatever whatever -d abc1 abc2 abc3"),
-    ])
+    ], ids=["scan", "scan_positional", "magic_scan", "super_scan"])
 def test_add_detectors(sample_line, expected, local_data_source):
     assert (ret := add_detectors(sample_line, local_data_source)) == expected, ret
 
 
 @pytest.mark.parametrize(
     "sample_line,plan_information,expected", [
-        ("scan -m -1 1 --num 10", PlanInformation("scan", "scan", None), "scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
-        ("scan -m -1 1 --num 10", PlanInformation("scan", "scan", None, has_detectors=True), "scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
-        ("scan -m -1 1 --num 10", PlanInformation("scan", "scan", None, has_detectors=False), "scan -m -1 1 --num 10"),
-        ("%scan -m -1 1 --num 10", PlanInformation("scan", "scan", None, has_detectors=False), "%scan -m -1 1 --num 10"),
-        ("super_scan -m -1 1 --num 10", PlanInformation("super_scan", "scan", None), "super_scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
-        ("super_scan -m -1 1 --num 10", PlanInformation("super_scan", "scan", None, has_detectors=True), "super_scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
-        ("super_scan -m -1 1 --num 10", PlanInformation("super_scan", "scan", None, has_detectors=False), "super_scan -m -1 1 --num 10"),
-        ("%super_scan -m -1 1 --num 10", PlanInformation("super_scan", "scan", None, has_detectors=False), "%super_scan -m -1 1 --num 10"),
-    ])
+        ("scan -m -1 1 --num 10", _SCAN_INFO, "scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
+        ("scan -m -1 1 --num 10", _SCAN_INFO_WITH_DETECTORS, "scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
+        ("scan -m -1 1 --num 10", _SCAN_INFO_WITHOUT_DETECTORS, "scan -m -1 1 --num 10"),
+        ("%scan -m -1 1 --num 10", _SCAN_INFO_WITHOUT_DETECTORS, "%scan -m -1 1 --num 10"),
+        ("super_scan -m -1 1 --num 10", _SUPER_SCAN_INFO, "super_scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
+        ("super_scan -m -1 1 --num 10", _SUPER_SCAN_INFO_WITH_DETECTORS, "super_scan -m -1 1 --num 10 -d abc1 abc2 abc3"),
+        ("super_scan -m -1 1 --num 10", _SUPER_SCAN_INFO_WITHOUT_DETECTORS, "super_scan -m -1 1 --num 10"),
+        ("%super_scan -m -1 1 --num 10", _SUPER_SCAN_INFO_WITHOUT_DETECTORS, "%super_scan -m -1 1 --num 10"),
+    ], ids=["scan", "scan_with_detectors", "scan_without_detectors", "magic_scan_without_detectors", "super_scan", "super_scan_with_detectors", "super_scan_without_detectors", "magic_super_scan_without_detectors"])
 def test_add_detectors_with_plan_information(sample_line, plan_information, expected, local_data_source):
     assert (ret := add_detectors(sample_line, local_data_source, plan_information=plan_information)) == expected, ret
 
@@ -55,7 +63,7 @@ def test_add_detectors_with_plan_information(sample_line, plan_information, expe
         ("scan -mvs1 -1 1 10 0.1", "scan -mvs1 -1 1 10 0.1 --md READ_BEFORE=xyz1 READ_DURING=mno1,mno2 READ_AFTER=rst1,rst2"),
         ("%scan -mvs1 -1 1 10 0.1", "%scan -mvs1 -1 1 10 0.1 --md READ_BEFORE=xyz1 READ_DURING=mno1,mno2 READ_AFTER=rst1,rst2"),
         ("super_scan whatever whatever", "super_scan whatever whatever --md READ_BEFORE=xyz1 READ_DURING=mno1,mno2 READ_AFTER=rst1,rst2"),
-    ])
+    ], ids=["scan", "scan_positional", "magic_scan", "super_scan"])
 def test_add_metadata(sample_line, expected, local_data_source):
     assert (ret := add_metadata(sample_line, local_data_source)) == expected, ret
 
@@ -66,7 +74,7 @@ def test_add_metadata(sample_line, expected, local_data_source):
         ("scan -mvs1 -1 1 10 0.1", "scan -mvs1 -1 1 10 0.1 --plan_target abc2 --md MAIN_COUNTER=abc2"),
         ("%scan -mvs1 -1 1 10 0.1", "%scan -mvs1 -1 1 10 0.1 --plan_target abc2 --md MAIN_COUNTER=abc2"),
         ("super_scan whatever whatever", "super_scan whatever whatever --plan_target abc2 --md MAIN_COUNTER=abc2"),
-    ])
+    ], ids=["scan", "scan_positional", "magic_scan", "super_scan"])
 def test_add_plan_target(sample_line, expected, local_data_source):
     assert (ret := add_plan_target(sample_line, local_data_source)) == expected, ret
 
@@ -87,6 +95,14 @@ def test_add_plan_target_one_detector_no_main():
         (["super_scan whatever whatever"], ["super_scan whatever whatever"]),
         (["mov xyz1 -1 xyz2 1"], ["mov xyz1 -1 xyz2 1 --md READ_BEFORE=xyz1 READ_DURING=mno1,mno2 READ_AFTER=rst1,rst2 --plan_target abc2 --md MAIN_COUNTER=abc2"]),
         (["%mov xyz1 -1 xyz2 1"], ["%mov xyz1 -1 xyz2 1 --md READ_BEFORE=xyz1 READ_DURING=mno1,mno2 READ_AFTER=rst1,rst2 --plan_target abc2 --md MAIN_COUNTER=abc2"]),
-    ])
+        (
+            ["mov xyz1 -1", "ascan -m -1 1 --num 10", "super_scan whatever whatever"],
+            [
+                "mov xyz1 -1 --md READ_BEFORE=xyz1 READ_DURING=mno1,mno2 READ_AFTER=rst1,rst2 --plan_target abc2 --md MAIN_COUNTER=abc2",
+                "ascan -m -1 1 --num 10 -d abc1 abc2 abc3 --md READ_BEFORE=xyz1 READ_DURING=mno1,mno2 READ_AFTER=rst1,rst2 --plan_target abc2 --md MAIN_COUNTER=abc2",
+                "super_scan whatever whatever",
+            ],
+        ),
+    ], ids=["ascan", "ascan_positional", "not_whitelisted", "mov", "magic_mov", "mov_then_ascan"])
 def test_input_processor(sample_lines, expected, local_data_source):
     assert (ret := input_processor(sample_lines, whitelisted_plan_list, local_data_source)) == expected, ret
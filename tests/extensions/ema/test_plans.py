@@ -3,21 +3,34 @@
 import pytest
 
 import argparse
+import math
 import os
 
 from datetime import datetime
 from unittest.mock import patch
 
-from sophys.cli.core.magics import setup_plan_magics, get_from_namespace, NamespaceKeys
+from sophys.cli.core.magics import setup_plan_magics, add_to_namespace, get_from_namespace, NamespaceKeys
 from sophys.cli.core.magics.plan_magics import ModeOfOperation, PlanWhitelist
 
 from sophys.cli.extensions.ema import plans, whitelisted_plan_list
 
 
-@pytest.fixture
-def mock_datetime():
-    mock_now = datetime.now()
+_WHITELIST = PlanWhitelist(*whitelisted_plan_list)
+
+# None of these tests change directory, so this is the default HDF file path for all of them.
+_CWD = os.getcwd()
+
+_TEST_DATA_KEY = NamespaceKeys.TEST_DATA
+
 
+@pytest.fixture(scope="module")
+def mock_now():
+    return datetime.now()
+
+
+# The patch itself stays per-test, so 'datetime.datetime' is only a mock while a test asks for it.
+@pytest.fixture
+def mock_datetime(mock_now):
     patcher = patch("datetime.datetime")
 
     patched_datetime = patcher.start()
@@ -28,13 +41,23 @@ def mock_datetime():
     patcher.stop()
 
 
-def test_hdf_base_scan(mock_datetime):
-    hdf_base_scan = plans._HDFBaseScanCLI()
+@pytest.fixture(scope="module")
+def hdf_file_names(mock_now):
+    return {prefix: mock_now.strftime(f"{prefix}_%H_%M_%S") for prefix in ("ascan", "rscan", "gridscan", "jittermap", "list_ascan", "list_rscan")}
+
+
+@pytest.fixture(scope="module")
+def hdf_base_scan():
+    return plans._HDFBaseScanCLI()
 
-    parser = argparse.ArgumentParser()
-    hdf_base_scan.add_hdf_arguments(parser)
 
-    args = parser.parse_known_args(["--hdf_file_name", "abacaxi_%S", "--hdf_file_path", "/tmp/"])
+@pytest.fixture(scope="module")
+def hdf_parser(hdf_base_scan):
+    return hdf_base_scan.add_hdf_arguments(argparse.ArgumentParser())
+
+
+def test_hdf_base_scan(hdf_base_scan, hdf_parser, mock_datetime):
+    args = hdf_parser.parse_known_args(["--hdf_file_name", "abacaxi_%S", "--hdf_file_path", "/tmp/"])
     assert args[0].hdf_file_name == "abacaxi_%S"
     assert args[0].hdf_file_path == "/tmp/"
 
@@ -42,247 +65,336 @@ def test_hdf_base_scan(mock_datetime):
     assert parsed_name == mock_datetime.strftime(args[0].hdf_file_name)
     assert parsed_path == "/tmp/"
 
-    args[0].hdf_file_path = None
-    parsed_name, parsed_path = hdf_base_scan.parse_hdf_args(args[0])
-    assert parsed_name == mock_datetime.strftime(args[0].hdf_file_name)
-    assert parsed_path == os.getcwd()
+    ns = argparse.Namespace(hdf_file_name="abacaxi_%S", hdf_file_path=None)
+    parsed_name, parsed_path = hdf_base_scan.parse_hdf_args(ns)
+    assert parsed_name == mock_datetime.strftime(ns.hdf_file_name)
+    assert parsed_path == _CWD
 
-    parsed_name, parsed_path = hdf_base_scan.parse_hdf_args(args[0], template="%H_cenoura")
-    assert parsed_name == mock_datetime.strftime(args[0].hdf_file_name)
-    assert parsed_path == os.getcwd()
+    parsed_name, parsed_path = hdf_base_scan.parse_hdf_args(ns, template="%H_cenoura")
+    assert parsed_name == mock_datetime.strftime(ns.hdf_file_name)
+    assert parsed_path == _CWD
 
-    args[0].hdf_file_name = None
-    parsed_name, parsed_path = hdf_base_scan.parse_hdf_args(args[0], template="%H_cenoura")
+    ns = argparse.Namespace(hdf_file_name=None, hdf_file_path=None)
+    parsed_name, parsed_path = hdf_base_scan.parse_hdf_args(ns, template="%H_cenoura")
     assert parsed_name == mock_datetime.strftime("%H_cenoura")
-    assert parsed_path == os.getcwd()
+    assert parsed_path == _CWD
 
 
-def test_after_base_scan():
-    after_base_scan = plans._AfterBaseScanCLI()
+@pytest.fixture(scope="module")
+def after_base_scan():
+    return plans._AfterBaseScanCLI()
 
-    parser = argparse.ArgumentParser()
-    after_base_scan.add_after_arguments(parser)
 
-    args = parser.parse_known_args(["--plan_target", "abc"])
+@pytest.fixture(scope="module")
+def after_parser(after_base_scan):
+    return after_base_scan.add_after_arguments(argparse.ArgumentParser())
+
+
+def test_after_base_scan(after_base_scan, after_parser):
+    args = after_parser.parse_known_args(["--plan_target", "abc"])
     assert not args[0].max
     assert args[0].plan_target == "abc"
 
     behavior = after_base_scan.get_after_plan_behavior_argument(args[0])
     assert behavior == "return"
 
-    args = parser.parse_known_args(["--max", "--plan_target", "abc"])
+    args = after_parser.parse_known_args(["--max", "--plan_target", "abc"])
     assert args[0].max
     assert args[0].plan_target == "abc"
 
     behavior = after_base_scan.get_after_plan_behavior_argument(args[0])
     assert behavior == "max"
 
-    args[0].detectors = ["xyz"]
-    target = after_base_scan.get_after_plan_target_argument(args[0])
+    ns = argparse.Namespace(max=True, plan_target="abc", detectors=["xyz"])
+    target = after_base_scan.get_after_plan_target_argument(ns)
     assert target == "abc"
 
-    args[0].plan_target = None
-    target = after_base_scan.get_after_plan_target_argument(args[0])
+    ns = argparse.Namespace(max=True, plan_target=None, detectors=["xyz"])
+    target = after_base_scan.get_after_plan_target_argument(ns)
     assert target == "xyz"
 
 
-def test_before_base_scan():
-    before_base_scan = plans._BeforeBaseScanCLI()
+@pytest.fixture(scope="module")
+def before_base_scan():
+    return plans._BeforeBaseScanCLI()
 
-    parser = argparse.ArgumentParser()
-    before_base_scan.add_before_arguments(parser)
 
-    args = parser.parse_known_args(["--plan_target", "abc"])
+@pytest.fixture(scope="module")
+def before_parser(before_base_scan):
+    return before_base_scan.add_before_arguments(argparse.ArgumentParser())
+
+
+def test_before_base_scan(before_base_scan, before_parser):
+    args = before_parser.parse_known_args(["--plan_target", "abc"])
     assert not args[0].max
     assert args[0].plan_target == "abc"
 
     behavior = before_base_scan.get_before_plan_behavior_argument(args[0])
     assert behavior is None
 
-    args = parser.parse_known_args(["--max", "--plan_target", "abc"])
+    args = before_parser.parse_known_args(["--max", "--plan_target", "abc"])
     assert args[0].max
     assert args[0].plan_target == "abc"
 
     behavior = before_base_scan.get_before_plan_behavior_argument(args[0])
     assert behavior == "max"
 
-    args[0].detectors = ["xyz"]
-    target = before_base_scan.get_before_plan_target_argument(args[0])
+    ns = argparse.Namespace(max=True, plan_target="abc", detectors=["xyz"])
+    target = before_base_scan.get_before_plan_target_argument(ns)
     assert target == "abc"
 
-    args[0].plan_target = None
-    target = before_base_scan.get_before_plan_target_argument(args[0])
+    ns = argparse.Namespace(max=True, plan_target=None, detectors=["xyz"])
+    target = before_base_scan.get_before_plan_target_argument(ns)
     assert target == "xyz"
 
 
 @pytest.fixture
 def ip_with_plans(ip, ok_mock_api):
-    setup_plan_magics(ip, "ema", PlanWhitelist(*whitelisted_plan_list), ModeOfOperation.Test)
+    setup_plan_magics(ip, "ema", _WHITELIST, ModeOfOperation.Test)
 
     print("List of registered magics:")
     print(ip.magics_manager.lsmagic()["line"].keys())
 
     yield ip
 
-
-def test_ascan(ip_with_plans, mock_datetime, capsys):
-    ip_with_plans.run_magic("ascan", "-h")
+    # Don't let the last plan's data leak into tests sharing the same shell.
+    add_to_namespace(_TEST_DATA_KEY, None, ipython=ip)
+
+
+def _run_and_fetch(ip, magic_name, magic_args):
+    ip.run_magic(magic_name, magic_args)
+    return get_from_namespace(_TEST_DATA_KEY, ipython=ip)
+
+
+_GRID_SCAN_ARGS = ("sim1", -1.0, 1.0, 10, "sim2", -0.5, 0.5, 10)
+
+# Expected **kwargs value for keys that must not be passed to the plan at all.
+_ABSENT = object()
+
+# (magic name, HDF file name prefix, [(magic arguments, expected *args, expected **kwargs)])
+_SCAN_CASES = [
+    ("ascan", "ascan", [
+        ("sim -1 1 10", ("sim", -1.0, 1.0), {"number_of_steps": 10, "exposure_time": None}),
+        ("sim -1 1 10 0.1", ("sim", -1.0, 1.0), {"number_of_steps": 10, "exposure_time": 0.1}),
+        ("sim -1 1 sim2 -2 1.5 15 0.25", ("sim", -1.0, 1.0, "sim2", -2, 1.5), {"number_of_steps": 15, "exposure_time": 0.25}),
+    ]),
+    ("rscan", "rscan", [
+        ("sim -1 1 10", ("sim", -1.0, 1.0), {"number_of_steps": 10, "exposure_time": None}),
+        ("sim -1 1 10 0.1", ("sim", -1.0, 1.0), {"number_of_steps": 10, "exposure_time": 0.1}),
+        ("sim -1 1 sim2 -2 1.5 15 0.25", ("sim", -1.0, 1.0, "sim2", -2, 1.5), {"number_of_steps": 15, "exposure_time": 0.25}),
+    ]),
+    ("grid_scan", "gridscan", [
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10", _GRID_SCAN_ARGS, {"exposure_time": None, "snake_axes": False}),
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10 0.25", _GRID_SCAN_ARGS, {"exposure_time": 0.25, "snake_axes": False}),
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10 0.25 -s", _GRID_SCAN_ARGS, {"exposure_time": 0.25, "snake_axes": True}),
+    ]),
+    ("rel_grid_scan", "gridscan", [
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10", _GRID_SCAN_ARGS, {"exposure_time": None, "snake_axes": False}),
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10 0.25", _GRID_SCAN_ARGS, {"exposure_time": 0.25, "snake_axes": False}),
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10 0.25 -s", _GRID_SCAN_ARGS, {"exposure_time": 0.25, "snake_axes": True}),
+    ]),
+    ("jittermap", "jittermap", [
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10", _GRID_SCAN_ARGS, {"exposure_time": None, "snake_axes": False, "absolute": _ABSENT}),
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10 0.25 -s", _GRID_SCAN_ARGS, {"exposure_time": 0.25, "snake_axes": True, "absolute": _ABSENT}),
+    ]),
+]
+
+
+@pytest.mark.parametrize(
+    "magic_name,usage", [
+        ("ascan", "usage: ascan motor start stop"),
+        ("rscan", "usage: rscan motor start stop"),
+        ("grid_scan", "usage: grid_scan motor start stop num motor start stop num"),
+        ("rel_grid_scan", "usage: rel_grid_scan motor start stop num motor start stop num"),
+    ])
+def test_scan_help(magic_name, usage, ip_with_plans, capsys):
+    ip_with_plans.run_magic(magic_name, "-h")
 
     captured = capsys.readouterr()
-    assert "usage: ascan motor start stop" in captured.out
+    assert usage in captured.out
 
-    ip_with_plans.run_magic("ascan", "sim -1 1 10")
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim", -1.0, 1.0)  # *args
-    assert plan_data[2]["number_of_steps"] == 10
-    assert plan_data[2]["exposure_time"] is None
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("ascan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+@pytest.mark.parametrize("magic_name,hdf_prefix,invocations", _SCAN_CASES, ids=[case[0] for case in _SCAN_CASES])
+def test_scan(magic_name, hdf_prefix, invocations, ip_with_plans, mock_datetime, hdf_file_names):
+    for magic_args, expected_args, expected_kwargs in invocations:
+        plan_data = _run_and_fetch(ip_with_plans, magic_name, magic_args)
+        assert plan_data[1][1:] == expected_args, magic_args  # *args
+        for key, value in expected_kwargs.items():
+            if value is _ABSENT:
+                assert key not in plan_data[2], (magic_args, key)
+            elif value is None or isinstance(value, bool):
+                assert plan_data[2][key] is value, (magic_args, key)
+            else:
+                assert plan_data[2][key] == value, (magic_args, key)
+        assert plan_data[2]["hdf_file_name"] == hdf_file_names[hdf_prefix]
+        assert plan_data[2]["hdf_file_path"] == _CWD
 
-    ip_with_plans.run_magic("ascan", "sim -1 1 10 0.1")
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim", -1.0, 1.0)  # *args
-    assert plan_data[2]["number_of_steps"] == 10
-    assert plan_data[2]["exposure_time"] == 0.1
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("ascan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+def test_mov(ip_with_plans, mock_datetime, capsys):
+    ip_with_plans.run_magic("mov", "-h")
 
-    ip_with_plans.run_magic("ascan", "sim -1 1 sim2 -2 1.5 15 0.25")
+    captured = capsys.readouterr()
+    assert "A simple 'mov' plan" in captured.out
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim", -1.0, 1.0, "sim2", -2, 1.5)  # *args
-    assert plan_data[2]["number_of_steps"] == 15
-    assert plan_data[2]["exposure_time"] == 0.25
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("ascan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+    plan_data = _run_and_fetch(ip_with_plans, "mov", "sim 0.1")
+    assert plan_data[1] == ("sim", 0.1)
+    assert plan_data[2]["use_old_data"] == 0
 
+    plan_data = _run_and_fetch(ip_with_plans, "mov", "sim1 1 sim2 2.3")
+    assert plan_data[1] == ("sim1", 1, "sim2", 2.3)
+    assert plan_data[2]["use_old_data"] == 0
 
-def test_rscan(ip_with_plans, mock_datetime, capsys):
-    ip_with_plans.run_magic("rscan", "-h")
+    plan_data = _run_and_fetch(ip_with_plans, "mov", "sim1 sim2 --max --plan_target sim_det")
+    assert plan_data[1] == ("sim1", "sim2")
+    assert plan_data[2]["target"] == "sim_det"
+    assert plan_data[2]["behavior"] == "max"
+    assert plan_data[2]["use_old_data"] == -1
 
-    captured = capsys.readouterr()
-    assert "usage: rscan motor start stop" in captured.out
 
-    ip_with_plans.run_magic("rscan", "sim -1 1 10")
+@pytest.mark.parametrize(
+    "magic_name,magic_args,expected_args,expected_exposure_time", [
+        ("list_ascan", "ms2r [1, 2, 3] wst 0.0 0.2 0.4", ("ms2r", (1.0, 2.0, 3.0), "wst", (0.0, 0.2, 0.4)), None),
+        ("list_ascan", "ms2r [1,2,3] wst 0.1", ("ms2r", (1.0, 2.0, 3.0), "wst", (0.1,)), None),
+        ("list_ascan", "ms2r (1, 2) wst (0.5, 0.6)", ("ms2r", (1.0, 2.0), "wst", (0.5, 0.6)), None),
+        ("list_ascan", "ms2r [1, 2, 3] -t 0.1", ("ms2r", (1.0, 2.0, 3.0)), 0.1),
+        ("list_rscan", "ms2r [-1, 0, 1] wst -0.1 0.1", ("ms2r", (-1.0, 0.0, 1.0), "wst", (-0.1, 0.1)), None),
+    ], ids=["split_list", "single_token_list", "tuple_list", "exposure_time_after_list", "relative"])
+def test_list_scan(magic_name, magic_args, expected_args, expected_exposure_time, ip_with_plans, mock_datetime, hdf_file_names):
+    plan_data = _run_and_fetch(ip_with_plans, magic_name, magic_args)
+    assert plan_data[1][1:] == expected_args  # *args
+    assert plan_data[2]["exposure_time"] == expected_exposure_time
+    assert plan_data[2]["absolute"] is (magic_name == "list_ascan")
+    assert plan_data[2]["hdf_file_name"] == hdf_file_names[magic_name]
+    assert plan_data[2]["hdf_file_path"] == _CWD
+
+
+@pytest.fixture(scope="module")
+def list_scan_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("args", nargs='+', action=plans.PlanNDListScan.RangeAction, type=str)
+    return parser
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim", -1.0, 1.0)  # *args
-    assert plan_data[2]["number_of_steps"] == 10
-    assert plan_data[2]["exposure_time"] is None
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("rscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
 
-    ip_with_plans.run_magic("rscan", "sim -1 1 10 0.1")
+def test_list_scan_non_finite_positions(list_scan_parser):
+    args = list_scan_parser.parse_args(["m", "inf", "n", "nan"]).args
+    assert args[0] == "m"
+    assert args[1] == (math.inf,)
+    assert args[2] == "n"
+    assert len(args[3]) == 1 and math.isnan(args[3][0])
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim", -1.0, 1.0)  # *args
-    assert plan_data[2]["number_of_steps"] == 10
-    assert plan_data[2]["exposure_time"] == 0.1
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("rscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
 
-    ip_with_plans.run_magic("rscan", "sim -1 1 sim2 -2 1.5 15 0.25")
+@pytest.mark.parametrize(
+    "magic_args,error", [
+        ("[1, 2] ms2r 0.1", "You need to specify a motor device before the list of positions."),
+        ("0.1 ms2r 0.2", "You need to specify a motor device before the list of positions."),
+        ("inf ms2r 0.2", "You need to specify a motor device before the list of positions."),
+        ("ms2r [1, 2", "Could not parse the positions starting at '[1, 2'."),
+        ("ms2r 1abc", "Could not parse '1abc' as a position."),
+        ("ms2r [1, abc]", "Could not parse '[1,abc]' as a list of positions."),
+    ], ids=["leading_list", "leading_position", "leading_non_finite_position", "unterminated_list", "malformed_position", "malformed_list"])
+def test_list_scan_errors(magic_args, error, list_scan_parser):
+    with pytest.raises(Exception) as exc_info:
+        list_scan_parser.parse_args(magic_args.split())
+    assert str(exc_info.value) == error
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim", -1.0, 1.0, "sim2", -2, 1.5)  # *args
-    assert plan_data[2]["number_of_steps"] == 15
-    assert plan_data[2]["exposure_time"] == 0.25
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("rscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
 
+def test_escan_toggles(ip_with_plans, mock_datetime):
+    plan_data = _run_and_fetch(ip_with_plans, "escan", "-e 1 2 3 --no-use-crio01")
+    assert plan_data[2]["use_undulator"] is True
+    assert plan_data[2]["use_crio01"] is False
+    assert plan_data[2]["use_crio02"] is True
 
-def test_abs_grid_scan(ip_with_plans, mock_datetime, capsys):
-    ip_with_plans.run_magic("grid_scan", "-h")
 
-    captured = capsys.readouterr()
-    assert "usage: grid_scan motor start stop num motor start stop num" in captured.out
+@pytest.mark.parametrize(
+    "magic_args,expected_target", [
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10 -e 1 2 3", None),
+        ("sim1 -1 1 10 sim2 -0.5 0.5 10 -e 1 2 3 -d det", "det"),
+    ], ids=["no_detector", "single_detector"])
+def test_grid_escan_after_plan_target(magic_args, expected_target, ip_with_plans, mock_datetime):
+    plan_data = _run_and_fetch(ip_with_plans, "grid_escan", magic_args)
+    # 'dcm_energy' is always added to the detectors, but never picked as the after plan target.
+    assert plan_data[2]["after_plan_target"] == expected_target
 
-    ip_with_plans.run_magic("grid_scan", "sim1 -1 1 10 sim2 -0.5 0.5 10")
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim1", -1.0, 1.0, 10, "sim2", -0.5, 0.5, 10)  # *args
-    assert plan_data[2]["exposure_time"] is None
-    assert plan_data[2]["snake_axes"] is False
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("gridscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+def test_escan_default_detectors_do_not_accumulate(ip_with_plans, mock_datetime):
+    for _ in range(2):
+        plan_data = _run_and_fetch(ip_with_plans, "escan", "-e 1 2 3")
+        assert list(plan_data[1][0]) == ["i0c", "i1c", "dcm_energy"]
 
-    ip_with_plans.run_magic("grid_scan", "sim1 -1 1 10 sim2 -0.5 0.5 10 0.25")
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim1", -1.0, 1.0, 10, "sim2", -0.5, 0.5, 10)  # *args
-    assert plan_data[2]["exposure_time"] == 0.25
-    assert plan_data[2]["snake_axes"] is False
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("gridscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+def test_list_scan_state_after_failed_parse(list_scan_parser):
+    with pytest.raises(Exception):
+        list_scan_parser.parse_args(["ms2r", "1", "wst", "1abc"])
 
-    ip_with_plans.run_magic("grid_scan", "sim1 -1 1 10 sim2 -0.5 0.5 10 0.25 -s")
+    args = list_scan_parser.parse_args(["ms2r", "[1, 2]"]).args
+    assert args == ["ms2r", (1.0, 2.0)]
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim1", -1.0, 1.0, 10, "sim2", -0.5, 0.5, 10)  # *args
-    assert plan_data[2]["exposure_time"] == 0.25
-    assert plan_data[2]["snake_axes"] is True
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("gridscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
 
+class _PureParserCLI(plans._CachedParserCLI):
+    def create_parser(self):
+        return argparse.ArgumentParser()
 
-def test_rel_grid_scan(ip_with_plans, mock_datetime, capsys):
-    ip_with_plans.run_magic("rel_grid_scan", "-h")
 
-    captured = capsys.readouterr()
-    assert "usage: rel_grid_scan motor start stop num motor start stop num" in captured.out
+class _ImpureParserCLI(_PureParserCLI):
+    _parser_is_pure = False
 
-    ip_with_plans.run_magic("rel_grid_scan", "sim1 -1 1 10 sim2 -0.5 0.5 10")
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim1", -1.0, 1.0, 10, "sim2", -0.5, 0.5, 10)  # *args
-    assert plan_data[2]["exposure_time"] is None
-    assert plan_data[2]["snake_axes"] is False
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("gridscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+class _DerivedParserCLI(_PureParserCLI):
+    def create_parser(self):
+        _a = super().create_parser()
+        _a.add_argument("x")
+        return _a
 
-    ip_with_plans.run_magic("rel_grid_scan", "sim1 -1 1 10 sim2 -0.5 0.5 10 0.25")
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim1", -1.0, 1.0, 10, "sim2", -0.5, 0.5, 10)  # *args
-    assert plan_data[2]["exposure_time"] == 0.25
-    assert plan_data[2]["snake_axes"] is False
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("gridscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+def test_cached_parser():
+    plan = _PureParserCLI()
+    assert plan.create_parser() is plan.create_parser()
+    assert _PureParserCLI().create_parser() is not plan.create_parser()
 
-    ip_with_plans.run_magic("rel_grid_scan", "sim1 -1 1 10 sim2 -0.5 0.5 10 0.25 -s")
+    impure_plan = _ImpureParserCLI()
+    assert impure_plan.create_parser() is not impure_plan.create_parser()
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1][1:] == ("sim1", -1.0, 1.0, 10, "sim2", -0.5, 0.5, 10)  # *args
-    assert plan_data[2]["exposure_time"] == 0.25
-    assert plan_data[2]["snake_axes"] is True
-    assert plan_data[2]["hdf_file_name"] == mock_datetime.strftime("gridscan_%H_%M_%S")
-    assert plan_data[2]["hdf_file_path"] == os.getcwd()
+    derived_plan = _DerivedParserCLI()
+    parser = derived_plan.create_parser()
+    assert parser is derived_plan.create_parser()
+    assert parser.parse_args(["abc"]).x == "abc"
 
 
-def test_mov(ip_with_plans, mock_datetime, capsys):
-    ip_with_plans.run_magic("mov", "-h")
+@pytest.fixture(scope="module")
+def energy_range_parser():
+    return plans._EnergyRangesScanCLI().add_energy_range_arguments(argparse.ArgumentParser())
 
-    captured = capsys.readouterr()
-    assert "A simple 'mov' plan" in captured.out
 
-    ip_with_plans.run_magic("mov", "sim 0.1")
+@pytest.mark.parametrize(
+    "magic_args,expected_e,expected_k", [
+        ("-e 1 2 3", [(0, 1.0, 2.0, 3.0)], None),
+        ("-e 1 2 3 -k 4 5", [(0, 1.0, 2.0, 3.0)], [(1, None, 4.0, 5.0)]),
+        ("-k 1 2 3 -e 4 5 6 -k 7 8", [(1, 4.0, 5.0, 6.0)], [(0, 1.0, 2.0, 3.0), (2, None, 7.0, 8.0)]),
+    ], ids=["energy_only", "k_without_start", "interleaved"])
+def test_energy_ranges(magic_args, expected_e, expected_k, energy_range_parser):
+    args = energy_range_parser.parse_args(magic_args.split())
+    assert args.e == expected_e
+    assert args.k == expected_k
+    assert args.relative_to == 0
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1] == ("sim", 0.1)
-    assert plan_data[2]["use_old_data"] == 0
 
-    ip_with_plans.run_magic("mov", "sim1 1 sim2 2.3")
+@pytest.mark.parametrize(
+    "magic_args,error", [
+        ("-e 1 2", "Can only specify an energy range with 3 values, not 2."),
+        ("-k 1 2", "You need to specify a range with a start position before specifying one without."),
+        ("-e 1 2 3 -k 4 5 6 7", "Can only specify a k-space range with 2 ou 3 values, not 4."),
+    ], ids=["energy_two_values", "k_without_start_first", "k_four_values"])
+def test_energy_ranges_errors(magic_args, error, energy_range_parser):
+    with pytest.raises(Exception) as exc_info:
+        energy_range_parser.parse_args(magic_args.split())
+    assert str(exc_info.value) == error
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1] == ("sim1", 1, "sim2", 2.3)
-    assert plan_data[2]["use_old_data"] == 0
 
-    ip_with_plans.run_magic("mov", "sim1 sim2 --max --plan_target sim_det")
+@pytest.mark.parametrize("magic_name", ["escan", "escan_fly", "grid_escan"])
+def test_escan_toggles_help(magic_name, ip_with_plans, capsys):
+    ip_with_plans.run_magic(magic_name, "-h")
 
-    plan_data = get_from_namespace(NamespaceKeys.TEST_DATA, ipython=ip_with_plans)
-    assert plan_data[1] == ("sim1", "sim2")
-    assert plan_data[2]["target"] == "sim_det"
-    assert plan_data[2]["behavior"] == "max"
-    assert plan_data[2]["use_old_data"] == -1
+    # Help lines get wrapped, so compare with normalized whitespace.
+    help_text = " ".join(capsys.readouterr().out.split())
+    # Each of the undulator / CRIO01 / CRIO02 toggles shows its default exactly once, whatever the Python version.
+    assert help_text.count("Defaults to true.") + help_text.count("(default: True)") == 3